@@ -1,5 +1,7 @@
 #!/usr/bin/env python3
 
+import hashlib
+import itertools
 import os
 import shutil
 import subprocess
@@ -9,8 +11,12 @@ from helpers import (
     FAILURE, INFO, SUCCESS,
     ARCHIVE_DIR, REMOTE_USER, REMOTE_IP, REMOTE_PATH,
     LAYERS,
+    lock_file_for,
+    lock_layers,
+    open_in_editor,
     select_items_fzf,
     parse_markdown_yaml,
+    write_compile_manifest,
     write_markdown_file,
 )
 
@@ -71,11 +77,35 @@ def update_source_metadata(filepath, target_name: str, target_filename: str):
     print(f"    -> {SUCCESS} metadata updated: {filepath.name}")
 
 
+def join_bodies(parts: list) -> tuple:
+    """Join non-empty bodies with blank lines.
+
+    Returns (body, ranges) where ranges[i] is the [start, end) UTF-8 byte range
+    of parts[i] within body, or None if that part was empty.
+    """
+    separator = "\n\n"
+    chunks = []
+    ranges = []
+    offset = 0
+    for part in parts:
+        if not part:
+            ranges.append(None)
+            continue
+        if chunks:
+            chunks.append(separator)
+            offset += len(separator.encode())
+        length = len(part.encode())
+        chunks.append(part)
+        ranges.append([offset, offset + length])
+        offset += length
+    return "".join(chunks), ranges
+
+
 def create_new_target(target_layer, title: str, summaries: list, bodies: list, 
                       total_word_count: int, total_word_count_goal: int) -> tuple:
-    """Create a new file in target layer."""
+    """Create a new file in target layer. Returns (path, filename, source_ranges, previous)."""
     summary = " ".join(summaries)
-    body = "\n\n".join(bodies)
+    body, ranges = join_bodies(bodies)
 
     # Pass raw title for aliases, sanitized for filename
     target_path = target_layer.create_file_from_body(body=body, title=title, summary=summary)
@@ -86,12 +116,12 @@ def create_new_target(target_layer, title: str, summaries: list, bodies: list,
     metadata["word_count"] = total_word_count
     write_markdown_file(target_path, metadata, file_body)
 
-    return target_path, target_path.name
+    return target_path, target_path.name, ranges, None
 
 
 def append_to_target(target_layer, target_filename: str, summaries: list, bodies: list,
                      total_word_count: int, total_word_count_goal: int) -> tuple:
-    """append to existing file in target layer."""
+    """append to existing file in target layer. Returns (path, filename, source_ranges, previous)."""
     target_path = target_layer.directory / target_filename
     
     if not target_path.exists():
@@ -101,17 +131,24 @@ def append_to_target(target_layer, target_filename: str, summaries: list, bodies
     print(f"    -> {INFO} parsing existing {target_layer.name}: {target_filename}...")
     metadata, body = parse_markdown_yaml(target_path)
     
+    # counters as they were before this compile, so unarchive can restore them
+    previous = {
+        "word_count": metadata.get("word_count", 0),
+        "word_count_goal": metadata.get("word_count_goal", 0),
+        "summary": metadata.get("summary"),
+    }
+    
     new_word_count = metadata.get("word_count", 0) + total_word_count
     new_word_count_goal = metadata.get("word_count_goal", 0) + total_word_count_goal
     new_summary = f'{metadata.get("summary", "")} {" ".join(summaries)}'
-    new_body = f"{body}\n\n{"\n\n".join(bodies)}"
+    new_body, ranges = join_bodies([body] + bodies)
     
     metadata["word_count"] = new_word_count
     metadata["word_count_goal"] = new_word_count_goal
     metadata["summary"] = new_summary.strip()
     
     write_markdown_file(target_path, metadata, new_body)
-    return target_path, target_filename
+    return target_path, target_filename, ranges[1:], previous
 
 
 def compile_layers(source_layer, target_layer):
@@ -127,9 +164,8 @@ def compile_layers(source_layer, target_layer):
     target_layer.ensure_exists()
     ARCHIVE_DIR.mkdir(parents=True, exist_ok=True)
     
-    # Select source files
-    source_files = source_layer.get_files()
-    selected_source_files = select_items_fzf(source_files, multi=True, 
+    # Select source files (streamed newest first, with previews from the metadata index)
+    selected_source_files = select_items_fzf(source_layer.iter_candidates(), multi=True, 
                                              prompt=f"select {source_layer.name} to compile -> ")
     
     if not selected_source_files:
@@ -139,8 +175,8 @@ def compile_layers(source_layer, target_layer):
     print(f"\n{len(selected_source_files)} files selected")
     
     # Select target
-    target_files = target_layer.get_files()
-    target_selection_list = [f"[CREATE NEW {target_layer.name.upper()}]"] + target_files
+    target_selection_list = itertools.chain([f"[CREATE NEW {target_layer.name.upper()}]"],
+                                            target_layer.iter_candidates())
     
     selected_target_files = select_items_fzf(target_selection_list, multi=False, 
                                              prompt=f"select {target_layer.name} to append to -> ")
@@ -151,30 +187,8 @@ def compile_layers(source_layer, target_layer):
     
     selected_target_file = selected_target_files[0]
     
-    # Aggregate data from source files
-    total_word_count_goal = 0
-    total_word_count = 0
-    summaries = []
-    bodies = []
-    
-    for filename in selected_source_files:
-        path = source_layer.directory / filename
-        metadata, body = parse_markdown_yaml(path)
-        
-        try:
-            total_word_count_goal += int(metadata.get("word_count_goal", 0))
-        except (ValueError, TypeError):
-            pass
-        try:
-            total_word_count += int(metadata.get("word_count", 0))
-        except (ValueError, TypeError):
-            pass
-        summary = metadata.get("summary", "")
-        if summary:
-            summaries.append(summary)
-        bodies.append(body)
-    
-    # Create or append to target
+    # Name the new target before taking any locks (don't hold them across a prompt)
+    target_title = None
     if selected_target_file.startswith("[CREATE NEW"):
         try:
             target_title = input(f"enter NEW {target_layer.name} title: ").strip()
@@ -184,22 +198,81 @@ def compile_layers(source_layer, target_layer):
         if not target_title:
             print(f"    -> {FAILURE} {target_layer.name} title is required for NEW {target_layer.name}")
             sys.exit(1)
-        
-        final_path, final_filename = create_new_target(target_layer, target_title, summaries, 
-                                                       bodies, total_word_count, total_word_count_goal)
-        print(f"    -> {SUCCESS} created NEW {target_layer.name}: {final_filename}")
-    else:
-        final_path, final_filename = append_to_target(target_layer, selected_target_file, summaries,
-                                                      bodies, total_word_count, total_word_count_goal)
-        print(f"    -> {SUCCESS} appended to {target_layer.name}: {final_filename}")
-    
-    print("-" * 30)
     
-    # Process source files
-    for filename in selected_source_files:
-        source_path = source_layer.directory / filename
-        update_source_metadata(source_path, target_layer.name, final_filename)
-        archive_and_transfer(source_path)
+    with lock_layers(source_layer, target_layer):
+        # Selections were made without locks; make sure nothing moved underneath us
+        live_source_files = set(source_layer.get_files())
+        missing = [f for f in selected_source_files if f not in live_source_files]
+        if missing:
+            print(f"    -> {FAILURE} no longer live in {source_layer.name}: {', '.join(missing)}")
+            sys.exit(1)
+        
+        # Aggregate data from source files
+        total_word_count_goal = 0
+        total_word_count = 0
+        summaries = []
+        bodies = []
+        manifest_sources = []
+        
+        for filename in selected_source_files:
+            path = source_layer.directory / filename
+            metadata, body = parse_markdown_yaml(path)
+            
+            try:
+                total_word_count_goal += int(metadata.get("word_count_goal", 0))
+            except (ValueError, TypeError):
+                pass
+            try:
+                total_word_count += int(metadata.get("word_count", 0))
+            except (ValueError, TypeError):
+                pass
+            summary = metadata.get("summary", "")
+            if summary:
+                summaries.append(summary)
+            bodies.append(body)
+            manifest_sources.append({
+                "filename": filename,
+                "afterlife": metadata.get("afterlife"),
+                "is_dead": bool(metadata.get("is_dead", False)),
+            })
+        
+        # Create or append to target
+        if selected_target_file.startswith("[CREATE NEW"):
+            final_path, final_filename, ranges, previous = create_new_target(
+                target_layer, target_title, summaries, bodies, total_word_count, total_word_count_goal)
+            print(f"    -> {SUCCESS} created NEW {target_layer.name}: {final_filename}")
+        else:
+            with lock_file_for(target_layer.directory / selected_target_file):
+                final_path, final_filename, ranges, previous = append_to_target(
+                    target_layer, selected_target_file, summaries, bodies, total_word_count, total_word_count_goal)
+            print(f"    -> {SUCCESS} appended to {target_layer.name}: {final_filename}")
+        
+        # Record what this compile did before touching the sources, so an interrupted
+        # compile (e.g. scp failing with the remote offline) can still be reverted
+        for source, source_range, body in zip(manifest_sources, ranges, bodies):
+            source["range"] = source_range
+            source["sha256"] = hashlib.sha256(body.encode()).hexdigest() if source_range else None
+        manifest_path = write_compile_manifest({
+            "source_layer": source_layer.name,
+            "target_layer": target_layer.name,
+            "target": final_filename,
+            "created_target": previous is None,
+            "previous": previous,
+            "sources": manifest_sources,
+        })
+        print(f"    -> {SUCCESS} compile manifest written: {manifest_path.name}")
+        
+        print("-" * 30)
+        
+        # Process source files
+        for filename in selected_source_files:
+            source_path = source_layer.directory / filename
+            # hold the file's lock until it has left the layer, so a concurrent word-count
+            # rewrite can't recreate it behind the archive
+            with lock_file_for(source_path):
+                update_source_metadata(source_path, target_layer.name, final_filename)
+                source_path = source_layer.move_to_partition(source_path, is_dead=True)
+                archive_and_transfer(source_path)
     
     # Open result
     print("-" * 30)
@@ -209,8 +282,8 @@ def compile_layers(source_layer, target_layer):
         sys.exit(0)
     
     if open_target == "y" or open_target == "Y":
-        print(f"opening {final_filename} in nvim...")
-        subprocess.call(["nvim", str(final_path)])
+        print(f"opening {final_filename}...")
+        open_in_editor(final_path)
     else:
         print(f"    -> {INFO} {target_layer.name} compile complete!")
 
@@ -2,19 +2,18 @@
 
 import sys
 import argparse
-import subprocess
 import datetime
 
 from helpers import (
     FAILURE, INFO,
     LAYERS,
+    lock_file_for,
+    open_in_editor,
     parse_metadata_header,
     sanitize_filename,
     write_markdown_file,
 )
 
-EDITOR = "nvim"
-
 
 def main():
     parser = argparse.ArgumentParser(
@@ -55,11 +54,7 @@ def main():
             sys.exit(0)
         file_path = drafts_layer.directory / selected[0]
         print(f"    -> {INFO} opening draft: {file_path.name}")
-        try:
-            subprocess.call([EDITOR, str(file_path)])
-        except FileNotFoundError:
-            print(f"    -> {FAILURE} editor not found: {EDITOR}")
-            sys.exit(1)
+        open_in_editor(file_path)
         update_word_count(file_path)
         sys.exit(0)
 
@@ -73,55 +68,55 @@ def main():
     
     word_count_goal = parsed_args.word_count_goal
 
-    file_path = drafts_layer.directory / sanitized_filename
-
-    # file creation
-    if not file_path.exists() or file_path.stat().st_size == 0:
-        print(f"    -> {INFO} creating draft: {file_path.name}")
-
-        try:
-            metadata = {
-                "aliases": [filename_str] if requires_alias else [],
-                "afterlife": None,
-                "is_dead": False,
-                "type": ["draft"],
-                "summary": None,
-                "word_count_goal": word_count_goal,
-                "word_count": 0,
-            }
-            write_markdown_file(file_path, metadata, "")
-        except IOError as e:
-            print(f"    -> {FAILURE} could not create draft: {e}")
-            sys.exit(1)
-    else:
-        print(f"    -> {INFO} opening draft: {file_path.name}")
+    # resolves to dead/ on a partitioned layer so a name is never reused across partitions
+    file_path = drafts_layer.file_path(sanitized_filename)
+
+    # file creation (locked so two panes creating the same draft don't race)
+    with lock_file_for(file_path):
+        if not file_path.exists() or file_path.stat().st_size == 0:
+            print(f"    -> {INFO} creating draft: {file_path.name}")
+
+            try:
+                metadata = {
+                    "aliases": [filename_str] if requires_alias else [],
+                    "afterlife": None,
+                    "is_dead": False,
+                    "type": ["draft"],
+                    "summary": None,
+                    "word_count_goal": word_count_goal,
+                    "word_count": 0,
+                }
+                write_markdown_file(file_path, metadata, "")
+            except IOError as e:
+                print(f"    -> {FAILURE} could not create draft: {e}")
+                sys.exit(1)
+        else:
+            print(f"    -> {INFO} opening draft: {file_path.name}")
 
 
 
     # open editor
-    try:
-        subprocess.call([EDITOR, str(file_path)])
-    except FileNotFoundError:
-        print(f"    -> {FAILURE} editor not found: {EDITOR}")
-        sys.exit(1)
+    open_in_editor(file_path)
 
     # post processing
     update_word_count(file_path)
 
 
 def update_word_count(file_path):
-    if not file_path.exists():
-        return
-
     try:
-        metadata, body = parse_metadata_header(file_path)
-        if not metadata:
-            metadata = {}
-
-        word_count = len(body.split())
-        metadata["word_count"] = word_count
-        
-        write_markdown_file(file_path, metadata, body)
+        with lock_file_for(file_path):
+            # checked under the lock: a compile may have archived the draft meanwhile
+            if not file_path.exists():
+                return
+
+            metadata, body = parse_metadata_header(file_path)
+            if not metadata:
+                metadata = {}
+
+            word_count = len(body.split())
+            metadata["word_count"] = word_count
+            
+            write_markdown_file(file_path, metadata, body)
         
         print(f"    -> {INFO} word count: {word_count}")
 
@@ -1,10 +1,20 @@
 #!/usr/bin/env python3
 
+import contextlib
+import datetime
+import fcntl
+import hashlib
+import io
+import itertools
 import json
 import os
 import re
+import shlex
+import shutil
 import subprocess
 import sys
+import tempfile
+import time
 from pathlib import Path
 from ruamel.yaml import YAML
 
@@ -40,12 +50,39 @@ HOLLOWAY_HOME = Path(os.environ.get("HOLLOWAY_HOME", str(DATA_DIR)))
 # Archive location (under the holloway home by default)
 ARCHIVE_DIR = Path(HOLLOWAY_HOME) / "writing" / "archives"
 
+# Compile manifests (one JSON file per compile, read by unarchive to revert it)
+MANIFEST_DIR = Path(HOLLOWAY_HOME) / "writing" / "manifests"
+
+# Name of the per-layer subdirectory holding dead files (partitioned layout only)
+DEAD_PARTITION = "dead"
+
+# Per-layer metadata index (snapshot of every file's frontmatter, keyed by filename)
+INDEX_FILENAME = ".index.json"
+
+# Advisory lock files for per-file and per-layer locking between concurrent commands
+LOCK_DIR = Path(HOLLOWAY_HOME) / "writing" / ".locks"
+# file locks are hashed into this many buckets so the lock dir stays bounded
+LOCK_BUCKETS = 256
+
+# files written atomically get the mode a plain open() would have given them
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
 # --- CONFIGURATION (YAML) ---
 yaml = YAML()
 yaml.preserve_quotes = True
 yaml.indent(mapping=2, sequence=4, offset=2)
 yaml.default_flow_style = False
 
+# --- CONFIGURATION (EDITOR) ---
+# editor command, split shell-style so flags (or a test stub) can be passed via the env
+EDITOR = shlex.split(os.environ.get("HOLLOWAY_EDITOR", "nvim"))
+# socket of a persistent neovim server, e.g. started in its own pane with `nvim --listen <socket>`
+XDG_RUNTIME_DIR = os.environ.get("XDG_RUNTIME_DIR", "/tmp")
+NVIM_SERVER = os.environ.get("HOLLOWAY_NVIM_SERVER", os.path.join(XDG_RUNTIME_DIR, "holloway-nvim.sock"))
+# seconds between checks for whether the file's buffer has been closed
+NVIM_POLL_INTERVAL = 0.5
+
 # --- CONFIGURATION (REMOTE) ---
 REMOTE_USER = ""
 REMOTE_IP = ""
@@ -73,6 +110,9 @@ class LayerConfig:
     def __init__(self, name: str, directory: str):
         self.name = name
         self.directory = self._expand_path(directory)
+        # dead files live here once the layer has been partitioned (see partition.py)
+        self.dead_directory = self.directory / DEAD_PARTITION
+        self.index_path = self.directory / INDEX_FILENAME
         # metadata field that links to the parent layer
         self.parent_field = "afterlife"
     
@@ -81,6 +121,11 @@ class LayerConfig:
         """Convert a path string to a Path object, expanding ~ notation."""
         return Path(os.path.expanduser(path_str))
     
+    @property
+    def is_partitioned(self) -> bool:
+        """True when dead files are kept in their own partition instead of frontmatter only."""
+        return self.dead_directory.is_dir()
+    
     def ensure_exists(self):
         """create directory if it doesn't exist"""
         self.directory.mkdir(parents=True, exist_ok=True)
@@ -92,13 +137,112 @@ class LayerConfig:
             sys.exit(1)
         
         files = sorted(self.directory.glob("*.md"))
-        if exclude_dead:
-            files = [f for f in files if is_not_dead(f)]
+        if self.is_partitioned:
+            # liveness is encoded by location, so no file needs to be opened
+            if not exclude_dead:
+                files = sorted(files + list(self.dead_directory.glob("*.md")), key=lambda f: f.name)
+        elif exclude_dead:
+            # read liveness from the index snapshot rather than opening every file
+            index = self.read_index()
+            files = [f for f in files if f.name in index and not index[f.name]["is_dead"]]
         return [f.name for f in files]
     
+    def iter_index(self, skip_dead_partition: bool = False):
+        """Yield (filename, entry) for every file in the layer, most recently modified first.
+
+        Entries come from the metadata index; only files whose mtime/size changed are
+        re-parsed, and the index is rewritten once the scan completes. Takes no locks:
+        files and the index are only ever replaced atomically, so every entry is a
+        complete snapshot of some version of its file.
+
+        With skip_dead_partition, a partitioned layer's dead/ is not touched at all and its
+        cached entries are carried over unchanged when the index is rewritten.
+        """
+        try:
+            with open(self.index_path, "r") as file:
+                cached = json.load(file)
+        except (OSError, json.JSONDecodeError):
+            cached = {}
+
+        directories = [(self.directory, False)]
+        if self.is_partitioned and not skip_dead_partition:
+            directories.append((self.dead_directory, True))
+
+        # stat-only pass so entries can be yielded newest first
+        found = []
+        for directory, in_dead_partition in directories:
+            with os.scandir(directory) as scan:
+                for dir_entry in scan:
+                    if dir_entry.name.endswith(".md") and dir_entry.is_file():
+                        found.append((dir_entry.stat(), dir_entry.name, dir_entry.path, in_dead_partition))
+        found.sort(key=lambda f: f[0].st_mtime_ns, reverse=True)
+
+        entries = {}
+        changed = False
+        for stat, name, path, in_dead_partition in found:
+            entry = cached.get(name)
+            if not (entry and entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size
+                    and entry["in_dead_partition"] == in_dead_partition):
+                metadata, _ = parse_metadata_header(Path(path))
+                entry = index_entry(metadata, stat, in_dead_partition)
+                changed = True
+            entries[name] = entry
+            yield name, entry
+
+        if self.is_partitioned and skip_dead_partition:
+            for name, entry in cached.items():
+                if entry.get("in_dead_partition") and name not in entries:
+                    entries[name] = entry
+
+        if changed or cached.keys() != entries.keys():
+            self.write_index(entries)
+    
+    def read_index(self) -> dict:
+        """Return {filename: entry} for every file in the layer (see iter_index)."""
+        return dict(self.iter_index())
+    
+    def iter_candidates(self, exclude_dead: bool = True):
+        """Yield (filename, preview) selector candidates, most recently modified first."""
+        for filename, entry in self.iter_index(skip_dead_partition=exclude_dead):
+            if exclude_dead and entry["is_dead"]:
+                continue
+            yield filename, format_preview(entry)
+    
+    def write_index(self, entries: dict) -> None:
+        """Atomically replace the metadata index. Best effort: it is only a cache."""
+        try:
+            atomic_write_text(self.index_path, json.dumps(entries, indent=1))
+        except OSError as e:
+            print(f"    -> {WARNING} could not write {self.name} index: {e}")
+    
+    def lock(self):
+        """Exclusive lock for operations that create, move or delete files in this layer."""
+        return file_lock(LOCK_DIR / f"layer-{self.name}.lock")
+    
+    def file_path(self, filename: str) -> Path:
+        """Resolve a filename to its path in whichever partition currently holds it."""
+        live_path = self.directory / filename
+        if self.is_partitioned and not live_path.exists():
+            dead_path = self.dead_directory / filename
+            if dead_path.exists():
+                return dead_path
+        return live_path
+    
+    def move_to_partition(self, filepath: Path, is_dead: bool) -> Path:
+        """Move a file into the live or dead partition. Returns its new path (unchanged if flat)."""
+        if not self.is_partitioned:
+            return filepath
+        destination = (self.dead_directory if is_dead else self.directory) / filepath.name
+        if destination != filepath:
+            os.replace(filepath, destination)
+        return destination
+    
     def create_file_from_body(self, body: str, title: str = "", summary: str = "") -> None:
         """Create a markdown file with standard YAML structure for this layer."""
         sanitized_filename, requires_alias = sanitize_filename(title)
+        if self.file_path(sanitized_filename).exists():
+            print(f"    -> {FAILURE} {self.name} file already exists: {sanitized_filename}")
+            sys.exit(1)
         filepath = self.directory / sanitized_filename
         metadata = {
             "aliases": [title] if requires_alias else [],
@@ -113,14 +257,15 @@ class LayerConfig:
         return filepath
     
     def select_file(self, multi: bool = False, prompt: str = None) -> list:
-        """fzf-based selection of live files in this layer."""
+        """fzf-based selection of live files in this layer, streamed newest first."""
         from helpers import select_items_fzf  # absolute import for script usage
-        files = self.get_files(exclude_dead=True)
-        if not files:
+        candidates = self.iter_candidates(exclude_dead=True)
+        first = next(candidates, None)
+        if first is None:
             print(f"    -> {WARNING} no live {self.name} files found")
             return []
         prompt_str = prompt or f"select {self.name} to edit > "
-        return select_items_fzf(files, multi=multi, prompt=prompt_str)
+        return select_items_fzf(itertools.chain([first], candidates), multi=multi, prompt=prompt_str)
 
 
 # Define available layers (order matters: lower index = lower in hierarchy)
@@ -135,6 +280,95 @@ LAYERS = {
 
 # --- UTILITY FUNCTIONS ---
 
+@contextlib.contextmanager
+def file_lock(lock_path: Path):
+    """Hold an exclusive advisory lock on lock_path for the duration of the block."""
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(lock_path, "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def lock_file_for(filepath: Path):
+    """Exclusive lock for a read-modify-write of one markdown file.
+
+    Keyed on the filename so the lock follows the file across partitions and the archive,
+    and hashed into LOCK_BUCKETS lock files. Unrelated files may share a bucket, so never
+    hold two file locks at once (not even on different files).
+    """
+    bucket = int(hashlib.sha1(filepath.name.encode()).hexdigest(), 16) % LOCK_BUCKETS
+    return file_lock(LOCK_DIR / f"file-{bucket:03d}.lock")
+
+
+@contextlib.contextmanager
+def lock_layers(*layers):
+    """Lock several layers in hierarchy order so concurrent commands can't deadlock."""
+    order = list(LAYERS.values())
+    with contextlib.ExitStack() as stack:
+        for layer in sorted(set(layers), key=order.index):
+            stack.enter_context(layer.lock())
+        yield
+
+
+def atomic_write_text(filepath: Path, text: str, fsync: bool = True, exclusive: bool = False) -> None:
+    """Write text to a temp file beside filepath, then rename it over filepath.
+
+    Bulk writers may pass fsync=False and flush once per batch instead. With
+    exclusive=True the file is linked into place and FileExistsError is raised
+    rather than replacing an existing file.
+    """
+    try:
+        mode = filepath.stat().st_mode & 0o777
+    except FileNotFoundError:
+        mode = 0o666 & ~_UMASK
+    fd, tmp_path = tempfile.mkstemp(dir=filepath.parent, prefix=f".{filepath.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as file:
+            file.write(text)
+            file.flush()
+            if fsync:
+                os.fsync(file.fileno())
+        os.chmod(tmp_path, mode)
+        if exclusive:
+            os.link(tmp_path, filepath)
+            os.remove(tmp_path)
+        else:
+            os.replace(tmp_path, filepath)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(tmp_path)
+        raise
+
+
+def index_entry(metadata: dict, stat: os.stat_result, in_dead_partition: bool = False) -> dict:
+    """Build a JSON-safe metadata index entry from parsed frontmatter."""
+    metadata = metadata or {}
+
+    def as_int(value):
+        try:
+            return int(value)
+        except (ValueError, TypeError):
+            return 0
+
+    summary = metadata.get("summary")
+    afterlife = metadata.get("afterlife")
+    imported_from = metadata.get("imported_from")
+    return {
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "in_dead_partition": in_dead_partition,
+        "is_dead": in_dead_partition or metadata.get("is_dead") is True,
+        "summary": str(summary) if summary else None,
+        "afterlife": str(afterlife) if afterlife else None,
+        "word_count": as_int(metadata.get("word_count", 0)),
+        "word_count_goal": as_int(metadata.get("word_count_goal", 0)),
+        "imported_from": str(imported_from) if imported_from else None,
+    }
+
+
 def sanitize_filename(text: str) -> tuple:
     """Convert text to a safe markdown filename. Returns (filename, requires_alias)."""
     safe = re.sub(r'[^a-z0-9-]', '-', text.lower()).strip('-')
@@ -149,23 +383,133 @@ def sanitize_filename(text: str) -> tuple:
     return base, requires_alias
 
 
-def is_not_dead(file: Path) -> bool:
-    """Check if a markdown file is not marked as dead."""
-    try:
-        with open(file, "r") as f:
-            head = f.read(1000)
-        return "is_dead: true" not in head
-    except (OSError, IOError, UnicodeDecodeError):
-        return False
-
+def format_preview(entry: dict) -> str:
+    """Selector preview text for a metadata index entry."""
+    word_count = entry["word_count"]
+    goal = entry["word_count_goal"]
+    lines = [entry["summary"] or "(no summary)"]
+    if goal:
+        lines.append(f"words: {word_count} / {goal} ({word_count * 100 // goal}%)")
+    else:
+        lines.append(f"words: {word_count}")
+    if entry["afterlife"]:
+        lines.append(f"afterlife: {entry['afterlife']}")
+    return "\n".join(lines)
+
+
+def _split_item(item) -> tuple:
+    """Selector items are either plain strings or (item, preview) pairs."""
+    if isinstance(item, tuple):
+        return item
+    return item, ""
+
+
+def fuzzy_score(query: str, candidate: str):
+    """Score candidate against query like fzf does. Returns None if it doesn't match.
+
+    Each whitespace-separated term must appear in order as a (case-insensitive)
+    subsequence; consecutive characters and word starts score higher, gaps lower.
+    """
+    candidate = candidate.lower()
+    score = 0
+    for term in query.lower().split():
+        position = -1
+        previous = -2
+        for char in term:
+            position = candidate.find(char, position + 1)
+            if position == -1:
+                return None
+            score += 1
+            if position == previous + 1:
+                score += 4
+            if position == 0 or candidate[position - 1] in " -_./":
+                score += 3
+            if previous >= 0:
+                score -= min(position - previous - 1, 5)
+            previous = position
+    return score
+
+
+def fuzzy_filter(query: str, items: list) -> list:
+    """Items matching query, best first (ties keep their original order)."""
+    scored = []
+    for item in items:
+        score = fuzzy_score(query, _split_item(item)[0])
+        if score is not None:
+            scored.append((score, item))
+    scored.sort(key=lambda pair: pair[0], reverse=True)
+    return [item for _, item in scored]
+
+
+def select_items_builtin(items: list, multi: bool = False, prompt: str = "select > ", limit: int = 15) -> list:
+    """Minimal fuzzy selector used when fzf isn't installed."""
+    # picks need a leading '#' so a filter made of digits (e.g. a date) is never a pick
+    print(f"    -> {INFO} fzf not found: type to filter, '#' and number to pick"
+          f"{' (e.g. #1 3)' if multi else ' (e.g. #1)'}, enter to abort")
+    query = ""
+    while True:
+        matches = fuzzy_filter(query, items)[:limit]
+        for number, item in enumerate(matches, 1):
+            name, preview = _split_item(item)
+            preview = preview.replace("\n", " · ")
+            print(f"  {number:>2}) {name}" + (f"  {BLUE}{preview}{RESET}" if preview else ""))
+        if not matches:
+            print(f"    -> {WARNING} no matches for '{query}'")
+
+        try:
+            response = input(prompt).strip()
+        except (KeyboardInterrupt, EOFError):
+            return []
+        if not response:
+            return []
 
-def select_items_fzf(items: list, multi: bool = False, prompt: str = "select > ") -> list:
-    """Interactive selection using fzf."""
-    if not items:
+        if not response.startswith("#"):
+            query = response
+            continue
+
+        numbers = response[1:].replace("#", " ").split()
+        if not numbers or not all(n.isdigit() and 1 <= int(n) <= len(matches) for n in numbers):
+            print(f"    -> {WARNING} pick numbers from the list above, e.g. #1")
+            continue
+        if len(numbers) > 1 and not multi:
+            print(f"    -> {WARNING} pick a single item")
+            continue
+        return [_split_item(matches[int(n) - 1])[0] for n in numbers]
+
+
+def select_items_fzf(items, multi: bool = False, prompt: str = "select > ") -> list:
+    """Interactive selection using fzf (or the built-in matcher if fzf isn't installed).
+
+    items may be any iterable of strings or (item, preview) pairs, e.g. a generator;
+    they are streamed into fzf as they are produced, so the list appears immediately.
+    """
+    items = iter(items)
+    first = next(items, None)
+    if first is None:
         print(f"    -> {WARNING} no items available...")
         sys.exit(0)
+    items = itertools.chain([first], items)
+
+    if shutil.which("fzf") is None:
+        selected = select_items_builtin(list(items), multi=multi, prompt=prompt)
+    else:
+        selected = _stream_to_fzf(items, multi=multi, prompt=prompt)
+
+    if not selected:
+        print(f"    -> {INFO} ABORTING: no files selected...")
+        sys.exit(0)
+
+    return selected
 
-    args = ["fzf", "--prompt", prompt, "--height=40%", "--reverse"]
+
+def _stream_to_fzf(items, multi: bool, prompt: str) -> list:
+    # each line is "item<TAB>preview"; fzf shows field 1 and renders field 2 in the preview,
+    # with newlines escaped for printf %b
+    args = [
+        "fzf", "--prompt", prompt, "--height=40%", "--reverse",
+        "--delimiter=\t", "--with-nth=1",
+        "--preview=printf '%b' {2}", "--preview-window=right:50%:wrap",
+    ]
 
     if multi:
         args.append("-m")
@@ -177,14 +521,74 @@ def select_items_fzf(items: list, multi: bool = False, prompt: str = "select > "
         text=True
     )
 
-    input_str = "\n".join(items)
-    stdout, _ = fzf.communicate(input=input_str)
-    
-    if fzf.returncode != 0 or not stdout.strip():
-        print(f"    -> {INFO} ABORTING: no files selected...")
-        sys.exit(0)
-        
-    return [x for x in stdout.split('\n') if x]
+    try:
+        for item in items:
+            name, preview = _split_item(item)
+            preview = preview.replace("\t", " ").replace("\\", "\\\\").replace("\n", "\\n")
+            fzf.stdin.write(f"{name}\t{preview}\n")
+            fzf.stdin.flush()
+        fzf.stdin.close()
+    except BrokenPipeError:
+        # a selection was made (or fzf quit) before every candidate was streamed
+        with contextlib.suppress(BrokenPipeError):
+            fzf.stdin.close()
+
+    stdout = fzf.stdout.read()
+    fzf.wait()
+
+    if fzf.returncode != 0:
+        return []
+    return [line.split("\t", 1)[0] for line in stdout.split('\n') if line]
+
+
+def _nvim_remote_expr(expr: str):
+    """Evaluate an expression in the neovim server. Returns its output, or None if unreachable."""
+    try:
+        result = subprocess.run(
+            EDITOR[:1] + ["--server", NVIM_SERVER, "--remote-expr", expr],
+            capture_output=True,
+            text=True,
+            timeout=5
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    if result.returncode != 0:
+        return None
+    return result.stdout.strip()
+
+
+def _open_in_nvim_server(filepath: Path) -> bool:
+    """Open a file in the running neovim server and wait for its buffer to close."""
+    if not Path(NVIM_SERVER).exists() or _nvim_remote_expr("1") != "1":
+        return False
+
+    # vim single-quoted string: the only escape is doubling the quote
+    path_str = "'" + str(filepath.resolve()).replace("'", "''") + "'"
+    if _nvim_remote_expr(f"execute('edit ' . fnameescape({path_str}))") is None:
+        return False
+
+    print(f"    -> {INFO} opened in running editor, close the buffer (:bd) to continue...")
+    try:
+        # an unreachable server (None) means it was quit, which also closes the buffer
+        while _nvim_remote_expr(f"bufloaded({path_str})") == "1":
+            time.sleep(NVIM_POLL_INTERVAL)
+    except KeyboardInterrupt:
+        print(f"    -> {INFO} stopped waiting for editor")
+    return True
+
+
+def open_in_editor(filepath: Path) -> None:
+    """Open a file in the running neovim server if there is one, otherwise spawn the editor.
+
+    Blocks until the file is closed either way.
+    """
+    if _open_in_nvim_server(filepath):
+        return
+    try:
+        subprocess.call(EDITOR + [str(filepath)])
+    except FileNotFoundError:
+        print(f"    -> {FAILURE} editor not found: {EDITOR[0]}")
+        sys.exit(1)
 
 
 def parse_metadata_header(filepath: Path) -> tuple:
@@ -193,7 +597,7 @@ def parse_metadata_header(filepath: Path) -> tuple:
         with open(filepath, "r") as file:
             content = file.read()
         
-        parts = re.split(r'^---$', content, flags=re.MULTILINE)
+        parts = re.split(r'^---$', content, maxsplit=2, flags=re.MULTILINE)
         if len(parts) >= 3:
             metadata = yaml.load(parts[1])
             body = parts[2].strip()
@@ -208,10 +612,10 @@ def parse_markdown_yaml(filepath: Path) -> tuple:
     with open(filepath, "r") as file:
         file_content = file.read()
     
-    file_parts = re.split(r'^---$', file_content, flags=re.MULTILINE)
+    file_parts = re.split(r'^---$', file_content, maxsplit=2, flags=re.MULTILINE)
     
     if not len(file_parts) == 3:
-        print(f"    -> {FAILURE} too many or too few instances of '---' in file content: {filepath.name}")
+        print(f"    -> {FAILURE} missing frontmatter delimiters '---' in file content: {filepath.name}")
         sys.exit(1)
     
     frontmatter = file_parts[1]
@@ -225,10 +629,36 @@ def parse_markdown_yaml(filepath: Path) -> tuple:
     return metadata, body.strip()
 
 
-def write_markdown_file(filepath: Path, metadata: dict, body: str) -> None:
-    """Write metadata and body to markdown file."""
-    with open(filepath, "w") as file:
-        file.write("---\n")
-        yaml.dump(metadata, file)
-        file.write("---\n\n")
-        file.write(body)
+def write_markdown_file(filepath: Path, metadata: dict, body: str, fsync: bool = True,
+                        exclusive: bool = False) -> None:
+    """Write metadata and body to markdown file (atomically, readers never see a partial file)."""
+    buffer = io.StringIO()
+    buffer.write("---\n")
+    yaml.dump(metadata, buffer)
+    buffer.write("---\n\n")
+    buffer.write(body)
+    atomic_write_text(filepath, buffer.getvalue(), fsync=fsync, exclusive=exclusive)
+
+
+def write_compile_manifest(manifest: dict) -> Path:
+    """Write a compile manifest and return its path. Filenames sort oldest -> newest."""
+    MANIFEST_DIR.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.datetime.now().strftime("%Y%m%dT%H%M%S%f")
+    target_stem = manifest["target"].replace(".md", "")
+    manifest_path = MANIFEST_DIR / f"{stamp}-{target_stem}.json"
+    atomic_write_text(manifest_path, json.dumps(manifest, indent=2))
+    return manifest_path
+
+
+def load_compile_manifests() -> list:
+    """Return [(path, manifest), ...] for every compile manifest, newest first."""
+    if not MANIFEST_DIR.exists():
+        return []
+    manifests = []
+    for manifest_path in sorted(MANIFEST_DIR.glob("*.json"), reverse=True):
+        try:
+            with open(manifest_path, "r") as file:
+                manifests.append((manifest_path, json.load(file)))
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"    -> {WARNING} could not read manifest {manifest_path.name}: {e}")
+    return manifests
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+
+import argparse
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from helpers import (
+    FAILURE, INFO, SUCCESS, WARNING,
+    ARCHIVE_DIR, LAYERS,
+    LayerConfig,
+    index_entry,
+    lock_file_for,
+    sanitize_filename,
+    write_markdown_file,
+    yaml,
+)
+
+# number of files each worker task reads, normalizes and writes before reporting back
+DEFAULT_BATCH_SIZE = 200
+
+
+def find_sources(source_dir: Path) -> list:
+    """All markdown files under source_dir, skipping hidden dirs like .obsidian and .trash."""
+    sources = []
+    for root, dirs, files in os.walk(source_dir):
+        dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+        for name in sorted(files):
+            if name.endswith(".md") and not name.startswith("."):
+                sources.append(Path(root) / name)
+    return sources
+
+
+def already_imported(index: dict) -> set:
+    """Source paths already imported: the layer's own files plus anything since archived.
+
+    Compiled sources leave the layer for the archive but keep their frontmatter, so the
+    archive's metadata index still carries their `imported_from`.
+    """
+    imported = {entry.get("imported_from") for entry in index.values()}
+    if ARCHIVE_DIR.is_dir():
+        archive = LayerConfig("archives", str(ARCHIVE_DIR))
+        imported |= {entry.get("imported_from") for entry in archive.read_index().values()}
+    imported.discard(None)
+    return imported
+
+
+def plan_imports(sources: list, layer, imported: set) -> tuple:
+    """Assign each source a unique filename in the layer.
+
+    Notes already imported (their resolved path is in `imported`, see already_imported)
+    are skipped, so re-running an import only picks up new notes.
+    Names that collide with each other or with unrelated files already in the layer get
+    a numeric suffix, with the original title kept as an alias.
+    Returns (plan, skipped, renamed) where plan is [(source, filename, title, requires_alias)].
+    """
+    plan = []
+    skipped = []
+    renamed = 0
+    taken = set()
+
+    for source in sources:
+        if str(source.resolve()) in imported:
+            skipped.append(source)
+            continue
+
+        title = source.stem
+        filename, requires_alias = sanitize_filename(title)
+        if filename == ".md":
+            filename = "untitled.md"
+            requires_alias = True
+
+        stem = filename.replace(".md", "")
+        suffix = 1
+        while filename in taken or layer.file_path(filename).exists():
+            suffix += 1
+            filename = f"{stem}-{suffix}.md"
+        if suffix > 1:
+            requires_alias = True
+            renamed += 1
+        taken.add(filename)
+
+        plan.append((source, filename, title, requires_alias))
+
+    return plan, skipped, renamed
+
+
+def split_frontmatter(content: str) -> tuple:
+    """Split a note into (metadata, body). Notes without valid frontmatter are all body."""
+    if content.startswith("---"):
+        parts = re.split(r'^---$', content, maxsplit=2, flags=re.MULTILINE)
+        if len(parts) == 3:
+            try:
+                metadata = yaml.load(parts[1])
+            except Exception:
+                metadata = None
+            if isinstance(metadata, dict):
+                return metadata, parts[2].strip()
+    return {}, content.strip()
+
+
+def normalize_metadata(metadata: dict, layer_name: str, title: str, requires_alias: bool, body: str,
+                       source: Path) -> dict:
+    """Coerce a note's frontmatter to the schema used by LayerConfig.create_file_from_body."""
+    aliases = metadata.get("aliases") or []
+    if isinstance(aliases, str):
+        aliases = [aliases]
+    aliases = [str(alias) for alias in aliases]
+    if requires_alias and title not in aliases:
+        aliases.append(title)
+
+    try:
+        word_count_goal = int(metadata.get("word_count_goal", 0))
+    except (ValueError, TypeError):
+        word_count_goal = 0
+
+    normalized = {
+        "aliases": aliases,
+        "afterlife": metadata.get("afterlife") or None,
+        "is_dead": metadata.get("is_dead") is True,
+        "type": [layer_name],
+        "summary": metadata.get("summary") or None,
+        "word_count_goal": word_count_goal,
+        "word_count": len(body.split()),
+        # lets a re-run recognise notes it already imported, whatever they were renamed to
+        "imported_from": str(source.resolve()),
+    }
+    # keep any extra fields the vault had, after the standard ones
+    for key, value in metadata.items():
+        if key not in normalized:
+            normalized[key] = value
+    return normalized
+
+
+def import_batch(layer_name: str, batch: list) -> tuple:
+    """Worker: import one batch of files. Returns ({filename: index_entry}, [(source, error)])."""
+    layer = LAYERS[layer_name]
+    partitioned = layer.is_partitioned
+    entries = {}
+    errors = []
+    written = []
+
+    for source, filename, title, requires_alias in batch:
+        try:
+            with open(source, "r") as file:
+                metadata, body = split_frontmatter(file.read())
+            metadata = normalize_metadata(metadata, layer_name, title, requires_alias, body, source)
+
+            in_dead_partition = partitioned and metadata["is_dead"]
+            directory = layer.dead_directory if in_dead_partition else layer.directory
+            filepath = directory / filename
+            # draft creates files under only the per-file lock, so check and create under it
+            # too; the exclusive create also refuses anything that slipped past the check
+            with lock_file_for(filepath):
+                if layer.file_path(filename).exists():
+                    errors.append((str(source), f"{filename} already exists"))
+                    continue
+                write_markdown_file(filepath, metadata, body, fsync=False, exclusive=True)
+            written.append(filepath)
+            entries[filename] = index_entry(metadata, filepath.stat(), in_dead_partition)
+        except FileExistsError:
+            errors.append((str(source), f"{filename} already exists"))
+        except Exception as e:
+            errors.append((str(source), str(e)))
+
+    sync_batch(written)
+    return entries, errors
+
+
+def sync_batch(paths: list) -> None:
+    """Flush a batch of written files, then the directories holding their new entries."""
+    for path in paths + sorted({path.parent for path in paths}):
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+def import_notes(source_dir: Path, layer, workers: int = None, batch_size: int = DEFAULT_BATCH_SIZE) -> None:
+    """Import every markdown note under source_dir into layer."""
+    sources = find_sources(source_dir)
+    if not sources:
+        print(f"    -> {WARNING} no markdown files found under {source_dir}")
+        return
+
+    layer.ensure_exists()
+    with layer.lock():
+        # refresh the index first: it tells us what was already imported, and the new
+        # entries merge into an up-to-date snapshot
+        index = layer.read_index()
+
+        plan, skipped, renamed = plan_imports(sources, layer, already_imported(index))
+        print(f"    -> {INFO} {len(sources)} notes found: {len(plan)} to import, "
+              f"{len(skipped)} already imported into {layer.name}, {renamed} renamed to avoid collisions")
+        if not plan:
+            return
+
+        batches = [plan[i:i + batch_size] for i in range(0, len(plan), batch_size)]
+        imported = 0
+        failures = []
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for entries, errors in pool.map(import_batch, [layer.name] * len(batches), batches):
+                index.update(entries)
+                imported += len(entries)
+                failures.extend(errors)
+                print(f"    -> {INFO} imported {imported}/{len(plan)}")
+
+        layer.write_index(index)
+
+    for source, error in failures:
+        print(f"    -> {FAILURE} could not import {source}: {error}")
+    print(f"    -> {SUCCESS} imported {imported} notes into {layer.name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog="import",
+        description="bulk import an existing markdown corpus into a layer",
+        add_help=True
+    )
+    parser.add_argument(
+        "source",
+        help="directory to import (walked recursively, hidden dirs skipped)"
+    )
+    parser.add_argument(
+        "layer",
+        help=f"layer to import into ({', '.join(LAYERS.keys())})"
+    )
+    parser.add_argument(
+        "-j", "--workers",
+        type=int,
+        default=None,
+        help="number of worker processes (default: one per CPU)"
+    )
+    parser.add_argument(
+        "-b", "--batch-size",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help=f"files per worker task (default: {DEFAULT_BATCH_SIZE})"
+    )
+
+    parsed_args = parser.parse_args()
+
+    if parsed_args.layer not in LAYERS:
+        print(f"    -> {FAILURE} unknown layer: {parsed_args.layer}")
+        print(f"    -> {INFO} available layers: {', '.join(LAYERS.keys())}")
+        sys.exit(1)
+
+    source_dir = Path(os.path.expanduser(parsed_args.source))
+    if not source_dir.is_dir():
+        print(f"    -> {FAILURE} source dir does not exist at {source_dir}")
+        sys.exit(1)
+
+    import_notes(source_dir, LAYERS[parsed_args.layer], parsed_args.workers, parsed_args.batch_size)
+
+
+if __name__ == "__main__":
+    main()
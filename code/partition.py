@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+
+import argparse
+import os
+import sys
+
+from helpers import (
+    FAILURE, INFO, SUCCESS, WARNING,
+    LAYERS,
+    lock_file_for,
+    parse_metadata_header,
+)
+
+
+def migrate_layer(layer) -> tuple:
+    """Split a layer into live/dead partitions based on each file's frontmatter.
+
+    Safe to re-run: files already in the right partition are left alone.
+    Returns (moved_to_dead, moved_to_live).
+    """
+    layer.ensure_exists()
+
+    with layer.lock():
+        layer.dead_directory.mkdir(exist_ok=True)
+        return _partition_files(layer)
+
+
+def _partition_files(layer) -> tuple:
+    moved_to_dead = 0
+    moved_to_live = 0
+
+    for directory, currently_dead in ((layer.directory, False), (layer.dead_directory, True)):
+        for filepath in sorted(directory.glob("*.md")):
+            metadata, _ = parse_metadata_header(filepath)
+            if not metadata:
+                print(f"    -> {WARNING} could not read frontmatter, leaving in place: {filepath.name}")
+                continue
+
+            is_dead = metadata.get("is_dead") is True
+            if is_dead == currently_dead:
+                continue
+
+            destination = (layer.dead_directory if is_dead else layer.directory) / filepath.name
+            if destination.exists():
+                print(f"    -> {WARNING} {destination.name} exists in both partitions, skipping")
+                continue
+
+            with lock_file_for(filepath):
+                os.replace(filepath, destination)
+            if is_dead:
+                moved_to_dead += 1
+            else:
+                moved_to_live += 1
+
+    return moved_to_dead, moved_to_live
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog="partition",
+        description="migrate layers to the live/dead partitioned layout",
+        add_help=True
+    )
+    parser.add_argument(
+        "layers",
+        nargs="*",
+        help=f"layers to migrate (default: all of {', '.join(LAYERS.keys())})"
+    )
+
+    parsed_args = parser.parse_args()
+    layer_names = parsed_args.layers or list(LAYERS.keys())
+
+    for name in layer_names:
+        if name not in LAYERS:
+            print(f"    -> {FAILURE} unknown layer: {name}")
+            print(f"    -> {INFO} available layers: {', '.join(LAYERS.keys())}")
+            sys.exit(1)
+
+    for name in layer_names:
+        layer = LAYERS[name]
+        moved_to_dead, moved_to_live = migrate_layer(layer)
+        print(f"    -> {SUCCESS} {name} partitioned: {moved_to_dead} moved to dead, {moved_to_live} revived")
+
+
+if __name__ == "__main__":
+    main()
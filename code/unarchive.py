@@ -1,16 +1,22 @@
 #!/usr/bin/env python3
 
+import argparse
+import hashlib
 import os
 import re
 import shutil
-import subprocess
 import sys
 
 from helpers import (
     FAILURE, INFO, SUCCESS,
     ARCHIVE_DIR, LAYERS,
+    LayerConfig,
+    load_compile_manifests,
+    lock_file_for,
+    lock_layers,
     parse_metadata_header,
     parse_markdown_yaml,
+    select_items_fzf,
     write_markdown_file,
 )
 
@@ -25,9 +31,11 @@ def get_grouped_archives():
 
     grouped_data = {}
 
-    for filepath in sorted(ARCHIVE_DIR.glob("*.md")):
-        metadata, _ = parse_metadata_header(filepath)
-        afterlife = metadata.get('afterlife', '')
+    # the archive isn't a layer, but it gets the same cached metadata index (newest first)
+    archive = LayerConfig("archives", str(ARCHIVE_DIR))
+    for filename, entry in archive.iter_index():
+        filepath = ARCHIVE_DIR / filename
+        afterlife = entry['afterlife']
         
         # extract scene name from "[[scene_name]]"
         match = re.search(r'\[\[(.*?)\]\]', str(afterlife))
@@ -50,35 +58,21 @@ def select_scenes_fzf(grouped_data):
         print(f"    -> {FAILURE} no archived items found")
         sys.exit(0)
 
-    # format list for FZF: "scene_name (X drafts)"
+    # format list for FZF: "scene_name (X drafts)", previewing the draft names
     display_list = []
     for scene, drafts in grouped_data.items():
-        display_list.append(f"{scene} ({len(drafts)} drafts)")
+        preview = "\n".join(draft.name for draft in drafts)
+        display_list.append((f"{scene} ({len(drafts)} drafts)", preview))
 
-    args = ["fzf", "-m", "--prompt=select scenes to decompile > ", "--height=40%", "--reverse"]
-
-    fzf = subprocess.Popen(
-        args,
-        stdin=subprocess.PIPE,
-        stdout=subprocess.PIPE,
-        text=True
-    )
-
-    input_str = "\n".join(display_list)
-    stdout, _ = fzf.communicate(input=input_str)
-    
-    if fzf.returncode != 0 or not stdout.strip():
-        print(f"    -> {FAILURE} no selection made")
-        sys.exit(0)
+    selected = select_items_fzf(display_list, multi=True, prompt="select scenes to decompile > ")
     
     # parse selection back to keys
     # "scene_name (3 drafts)" -> "scene_name"
     selected_keys = []
-    for line in stdout.split('\n'):
-        if line:
-            # split by last space to separate name from count
-            key = line.rsplit(' (', 1)[0]
-            selected_keys.append(key)
+    for line in selected:
+        # split by last space to separate name from count
+        key = line.rsplit(' (', 1)[0]
+        selected_keys.append(key)
             
     return selected_keys
 
@@ -104,13 +98,15 @@ def unarchive_drafts(draft_paths):
     for source_path in draft_paths:
         destination_path = drafts_layer.directory / source_path.name
 
-        if destination_path.exists():
+        # check both partitions so a revived draft never shadows a dead one
+        if drafts_layer.file_path(source_path.name).exists():
             print(f"    -> {INFO} file already exists in drafts: {source_path.name}")
             continue
 
         try:
-            shutil.move(source_path, destination_path)
-            revive_metadata(destination_path)
+            with lock_file_for(source_path):
+                shutil.move(source_path, destination_path)
+                revive_metadata(destination_path)
         except Exception as e:
             print(f"    -> {FAILURE} error moving {source_path.name}: {e}")
 
@@ -139,7 +135,167 @@ def prompt_delete_scene(scene_name):
         print(f"    -> {INFO} file not deleted: {scene_path.name}")
 
 
-def main():
+def manifest_candidates(manifests):
+    # "manifest_stem  3 drafts -> scenes/scene_name.md", previewing what a revert would touch
+    for manifest_path, manifest in manifests:
+        display = (
+            f"{manifest_path.stem}  {len(manifest['sources'])} {manifest['source_layer']}"
+            f" -> {manifest['target_layer']}/{manifest['target']}"
+        )
+        lines = ["new target (revert offers to delete it)" if manifest["created_target"]
+                 else f"restores word count to {manifest['previous']['word_count']}"]
+        lines += [f"  {source['filename']}" for source in manifest["sources"]]
+        yield display, "\n".join(lines)
+
+
+def select_manifests_fzf(manifests):
+    if not manifests:
+        print(f"    -> {FAILURE} no compile manifests found (try --legacy for older archives)")
+        sys.exit(0)
+
+    selected = select_items_fzf(manifest_candidates(manifests), multi=True,
+                                prompt="select compiles to revert > ")
+
+    selected_stems = {line.split()[0] for line in selected}
+    return [(path, manifest) for path, manifest in manifests if path.stem in selected_stems]
+
+
+def find_blocking_compile(manifest_path, manifest, manifests):
+    # a target can only be reverted newest-first: a newer compile into it would make byte
+    # ranges and counters drift, and a newer compile of it would duplicate its text
+    for other_path, other in manifests:
+        if other_path.name <= manifest_path.name:
+            continue
+        if other["target_layer"] == manifest["target_layer"] and other["target"] == manifest["target"]:
+            return other_path
+        if other["source_layer"] == manifest["target_layer"] and any(
+                source["filename"] == manifest["target"] for source in other["sources"]):
+            return other_path
+    return None
+
+
+def strip_sources_from_target(target_path, manifest):
+    # removes the appended byte ranges and restores the pre-compile counters
+    metadata, body = parse_markdown_yaml(target_path)
+    data = body.encode()
+
+    ranges = [source["range"] for source in manifest["sources"] if source["range"]]
+    for source in manifest["sources"]:
+        if not source["range"]:
+            continue
+        start, end = source["range"]
+        if hashlib.sha256(data[start:end]).hexdigest() != source["sha256"]:
+            print(f"    -> {FAILURE} {target_path.name} changed since compile, cannot revert exactly")
+            return False
+
+    # drop each range along with the blank-line separator that joined it
+    for start, end in sorted(ranges, reverse=True):
+        if data[start - 2:start] == b"\n\n":
+            start -= 2
+        elif data[end:end + 2] == b"\n\n":
+            end += 2
+        data = data[:start] + data[end:]
+
+    previous = manifest["previous"]
+    metadata["word_count"] = previous["word_count"]
+    metadata["word_count_goal"] = previous["word_count_goal"]
+    metadata["summary"] = previous["summary"]
+
+    write_markdown_file(target_path, metadata, data.decode())
+    print(f"    -> {SUCCESS} removed {len(ranges)} compiled bodies from {target_path.name}")
+    return True
+
+
+def is_left_by_compile(filepath, target):
+    # a source an interrupted compile marked dead but never finished archiving
+    metadata, _ = parse_metadata_header(filepath)
+    return metadata.get("is_dead") is True and metadata.get("afterlife") == f"[[{target.replace('.md', '')}]]"
+
+
+def restore_sources(source_layer, sources, target):
+    # moves archived sources back and restores their pre-compile liveness
+    for source in sources:
+        archive_path = ARCHIVE_DIR / source["filename"]
+        destination_path = source_layer.directory / source["filename"]
+
+        try:
+            with lock_file_for(archive_path):
+                current_path = source_layer.file_path(source["filename"])
+                if current_path.exists():
+                    if not is_left_by_compile(current_path, target):
+                        print(f"    -> {INFO} file already exists in {source_layer.name}: {source['filename']}")
+                        continue
+                    # the compile stopped before this source left the layer; revive it in
+                    # place and drop any archive copy made before the interruption
+                    if current_path != destination_path:
+                        os.replace(current_path, destination_path)
+                    if archive_path.exists():
+                        os.remove(archive_path)
+                elif archive_path.exists():
+                    shutil.move(archive_path, destination_path)
+                else:
+                    print(f"    -> {FAILURE} archived file not found: {source['filename']}")
+                    continue
+
+                metadata, body = parse_markdown_yaml(destination_path)
+                metadata["is_dead"] = source["is_dead"]
+                metadata["afterlife"] = source["afterlife"]
+                write_markdown_file(destination_path, metadata, body)
+                source_layer.move_to_partition(destination_path, is_dead=source["is_dead"])
+            print(f"    -> {SUCCESS} file revived: {source['filename']}")
+        except Exception as e:
+            print(f"    -> {FAILURE} error moving {source['filename']}: {e}")
+
+
+def revert_compile(manifest_path, manifest, manifests):
+    source_layer = LAYERS.get(manifest["source_layer"])
+    target_layer = LAYERS.get(manifest["target_layer"])
+    if source_layer is None or target_layer is None:
+        print(f"    -> {FAILURE} manifest refers to an unknown layer: {manifest_path.name}")
+        return False
+
+    blocking_path = find_blocking_compile(manifest_path, manifest, manifests)
+    if blocking_path is not None:
+        print(f"    -> {FAILURE} {manifest['target']} was used by a newer compile, revert {blocking_path.stem} first")
+        return False
+
+    source_layer.ensure_exists()
+
+    # ask before locking so other panes aren't blocked on the prompt
+    delete_target = False
+    if manifest["created_target"] and target_layer.file_path(manifest["target"]).exists():
+        response = input(f"    -> delete compiled {target_layer.name} '{manifest['target']}'? [y/N]: ").lower()
+        delete_target = response == 'y'
+
+    with lock_layers(source_layer, target_layer):
+        if not manifest_path.exists():
+            print(f"    -> {INFO} compile already reverted: {manifest_path.stem}")
+            return True
+
+        target_path = target_layer.file_path(manifest["target"])
+
+        if not target_path.exists():
+            # reviving the sources now would leave their text wherever the target went
+            print(f"    -> {FAILURE} target '{manifest['target']}' not found, cannot revert exactly")
+            return False
+
+        if manifest["created_target"]:
+            if delete_target:
+                os.remove(target_path)
+                print(f"    -> {INFO} deleted file: {target_path.name}")
+            else:
+                print(f"    -> {INFO} file not deleted: {target_path.name}")
+        else:
+            with lock_file_for(target_path):
+                if not strip_sources_from_target(target_path, manifest):
+                    return False
+
+        restore_sources(source_layer, manifest["sources"], manifest["target"])
+        os.remove(manifest_path)
+    return True
+
+
+def legacy_main():
     drafts_layer = LAYERS["drafts"]
     drafts_layer.ensure_exists()
     
@@ -158,11 +314,46 @@ def main():
         
         # move drafts back
         drafts = grouped_data.get(scene_key, [])
-        unarchive_drafts(drafts)
+        with drafts_layer.lock():
+            unarchive_drafts(drafts)
         
         # offer to delete scene
         prompt_delete_scene(scene_key)
 
 
+def main():
+    parser = argparse.ArgumentParser(
+        prog="unarchive",
+        description="revert compiles using their manifests",
+        add_help=True
+    )
+    parser.add_argument(
+        "--legacy",
+        action="store_true",
+        help="group the archive by 'afterlife' instead (for compiles made before manifests)"
+    )
+
+    parsed_args = parser.parse_args()
+
+    if parsed_args.legacy:
+        legacy_main()
+        return
+
+    # 1. load manifests
+    manifests = load_compile_manifests()
+
+    # 2. select compiles
+    selected = select_manifests_fzf(manifests)
+
+    print(f"\nreverting {len(selected)} compiles...")
+    print("-" * 30)
+
+    # 3. process, newest first
+    for manifest_path, manifest in selected:
+        print(f"\nprocessing compile: {manifest_path.stem}")
+        if revert_compile(manifest_path, manifest, manifests):
+            manifests = [(path, m) for path, m in manifests if path != manifest_path]
+
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()